@@ -1,793 +1,981 @@
-import streamlit as st
-from openai import OpenAI
-import os
-import time
-import re
-from pathlib import Path
-from dotenv import load_dotenv
-from typing import Optional, Tuple, Dict, Any
-import logging
-import base64
-
-try:
-    from ethics_handler import render_ethics_chat_interface, initialize_ethics_session_state
-    ETHICS_AVAILABLE = True
-except ImportError as e:
-    ETHICS_AVAILABLE = False
-
-# Add PDF reading functionality
-from PyPDF2 import PdfReader
-
-# Import our localization system
-from localization import language_manager, t, init_language_system, render_language_selector, get_rtl_css
-
-# Configure logging
-logging.basicConfig(level=logging.INFO)
-logger = logging.getLogger(__name__)
-
-# Load environment variables
-load_dotenv()
-
-# Configuration - Updated for multiple ethics PDFs
-class Config:
-    PROJECT_NAME = "Comprehensive Ethics Assistant"
-    COMPANY_NAME = "Ethics Center"
-    LOGO_PATH = "logo.png"
-    MAX_TOKENS = 1500
-    TEMPERATURE = 0.3
-    MODEL = "gpt-3.5-turbo"
-    TTS_MODEL = "tts-1"
-    TTS_VOICE = "alloy"
-    SUPPORTED_VOICES = {
-        'alloy': 'Alloy (Neutral)',
-        'echo': 'Echo (Male)', 
-        'fable': 'Fable (British Male)',
-        'onyx': 'Onyx (Deep Male)',
-        'nova': 'Nova (Female)',
-        'shimmer': 'Shimmer (Soft Female)'
-    }
-    # Multiple ethics PDFs configuration
-    ETHICS_PDF_FILES = [
-        "Islamic_Ethics.pdf",
-        "Islamic_Ethics2.pdf", 
-        "reforming_modernity.pdf"
-    ]
-
-# Initialize OpenAI
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-if OPENAI_API_KEY:
-    client = OpenAI(api_key=OPENAI_API_KEY)
-else:
-    client = None
-
-def load_logo_from_assets() -> Optional[str]:
-    """Load logo from assets folder and encode as base64"""
-    possible_paths = [
-        Path("assets") / "logo.png",
-        Path("assets") / "logo.jpg", 
-        Path("assets") / "logo.jpeg",
-        Path("assets") / "logo.svg",
-        Path("assets") / "roehampton_logo.png",
-        Path("assets") / "university_logo.png"
-    ]
-    
-    for logo_path in possible_paths:
-        if logo_path.exists():
-            try:
-                with open(logo_path, "rb") as img_file:
-                    img_bytes = img_file.read()
-                    img_base64 = base64.b64encode(img_bytes).decode()
-                    logger.info(f"Successfully loaded logo from: {logo_path}")
-                    return img_base64
-            except Exception as e:
-                logger.warning(f"Error loading logo from {logo_path}: {e}")
-                continue
-    
-    logger.info("No logo found in assets folder")
-    return None 
-
-# Page configuration
-st.set_page_config(
-    page_title=Config.PROJECT_NAME,
-    page_icon="📋",
-    layout="wide",
-    initial_sidebar_state="expanded",
-    menu_items={
-        'Get Help': None,
-        'Report a bug': None,
-        'About': f"# {Config.PROJECT_NAME}\nComprehensive ethics guidance from Islamic and contemporary perspectives"
-    }
-)
-
-def initialize_session_state() -> None:
-    """Initialize session state for ethics chat"""
-    # Audio settings
-    if 'audio_enabled' not in st.session_state:
-        st.session_state.audio_enabled = True
-    if 'selected_voice' not in st.session_state:
-        st.session_state.selected_voice = Config.TTS_VOICE
-    if 'audio_responses' not in st.session_state:
-        st.session_state.audio_responses = {}
-    
-    # Set dummy authentication data for ethics handler
-    if 'student_id' not in st.session_state:
-        st.session_state.student_id = "ETHICS_USER"
-    if 'student_data' not in st.session_state:
-        st.session_state.student_data = {
-            'programme': 'Comprehensive Ethics Assistant',
-            'code': 'ETHICS'
-        }
-    
-    # Initialize ethics session state if available
-    if ETHICS_AVAILABLE:
-        initialize_ethics_session_state()
-    
-    # Initialize language system
-    init_language_system()
-
-def generate_audio_response(text: str, voice: str = None) -> Optional[bytes]:
-    """Generate audio response using OpenAI TTS"""
-    if not client:
-        logger.error("OpenAI client not initialized")
-        return None
-    
-    if not text or not text.strip():
-        logger.error("No text provided for audio generation")
-        return None
-    
-    # Clean text for TTS
-    clean_text = clean_text_for_tts(text)
-    selected_voice = voice or st.session_state.get('selected_voice', Config.TTS_VOICE)
-    
-    try:
-        response = client.audio.speech.create(
-            model=Config.TTS_MODEL,
-            voice=selected_voice,
-            input=clean_text,
-            response_format="mp3"
-        )
-        return response.content
-    except Exception as e:
-        logger.error(f"Error generating audio: {e}")
-        return None
-
-def clean_text_for_tts(text: str) -> str:
-    """Clean text for text-to-speech by removing markdown and formatting"""
-    if not text:
-        return ""
-    
-    # Remove markdown formatting
-    text = re.sub(r'\*\*(.*?)\*\*', r'\1', text)  # **bold**
-    text = re.sub(r'\*(.*?)\*', r'\1', text)      # *italic*
-    text = re.sub(r'_(.*?)_', r'\1', text)        # _italic_
-    text = re.sub(r'^#+\s*', '', text, flags=re.MULTILINE)  # headers
-    text = re.sub(r'```.*?```', '', text, flags=re.DOTALL)  # code blocks
-    text = re.sub(r'`([^`]+)`', r'\1', text)      # inline code
-    text = re.sub(r'\[([^\]]+)\]\([^\)]+\)', r'\1', text)  # links
-    
-    # Remove emojis and special characters
-    text = re.sub(r'[🔑📄📚⚠️❌✅🤖🙋📊💾⏱️🔧🗑️🔄🔍🚨📁🎓📋🆔🔐]', '', text)
-    
-    # Clean up spaces and line breaks
-    text = re.sub(r'\n+', '. ', text)
-    text = re.sub(r'\s+', ' ', text)
-    
-    # Ensure proper sentence ending
-    text = text.strip()
-    if text and not text.endswith(('.', '!', '?')):
-        text += '.'
-    
-    return text
-
-def create_audio_player(audio_bytes: bytes, key: str = None) -> str:
-    """Create an HTML audio player with the audio data"""
-    if not audio_bytes:
-        return ""
-    
-    audio_base64 = base64.b64encode(audio_bytes).decode()
-    
-    if not key:
-        key = f"audio_{int(time.time() * 1000)}"
-    
-    audio_html = f"""
-    <div class="audio-player-container" style="margin: 10px 0;">
-        <div class="audio-controls" style="
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            border-radius: 25px;
-            padding: 10px 20px;
-            display: flex;
-            align-items: center;
-            gap: 15px;
-            box-shadow: 0 4px 15px rgba(102,126,234,0.3);
-        ">
-            <div style="color: white; font-weight: 500; display: flex; align-items: center; gap: 8px;">
-                🔊 <span style="font-size: 14px;">{t('audio_response', default='Audio Response')}</span>
-            </div>
-            <audio controls style="
-                height: 35px;
-                border-radius: 17px;
-                outline: none;
-                flex: 1;
-                min-width: 200px;
-            ">
-                <source src="data:audio/mp3;base64,{audio_base64}" type="audio/mpeg">
-                {t('audio_not_supported', default='Your browser does not support audio playback.')}
-            </audio>
-        </div>
-    </div>
-    """
-    
-    return audio_html
-
-def render_voice_selector():
-    """Render voice selector in sidebar"""
-    st.markdown(f"🎤 {t('voice_settings', default='Voice Settings')}")
-    
-    # Audio toggle
-    current_audio_state = st.session_state.get('audio_enabled', True)
-    audio_enabled = st.checkbox(
-        f"🔊 {t('enable_audio', default='Enable Audio Responses')}", 
-        value=current_audio_state,
-        help=t('audio_help', default='Toggle audio responses for accessibility')
-    )
-    st.session_state.audio_enabled = audio_enabled
-    
-    if audio_enabled:
-        # Voice selection
-        voice_options = list(Config.SUPPORTED_VOICES.keys())
-        current_voice = st.session_state.get('selected_voice', Config.TTS_VOICE)
-        
-        try:
-            current_index = voice_options.index(current_voice)
-        except ValueError:
-            current_index = 0
-        
-        selected_voice = st.selectbox(
-            f"🎭 {t('select_voice', default='Select Voice')}", 
-            options=voice_options,
-            format_func=lambda x: Config.SUPPORTED_VOICES[x],
-            index=current_index,
-            help=t('voice_help', default='Choose the voice for audio responses')
-        )
-        
-        st.session_state.selected_voice = selected_voice
-        
-        # Test voice button
-        if st.button(f"🎵 {t('test_voice', default='Test Voice')}", type="secondary"):
-            test_text = t('test_audio_text', default='Hello! This is how I will sound when reading responses to you.')
-            
-            with st.spinner(t('generating_audio', default='Generating audio...')):
-                audio_bytes = generate_audio_response(test_text, selected_voice)
-                
-            if audio_bytes:
-                audio_html = create_audio_player(audio_bytes, key="voice_test")
-                st.markdown(audio_html, unsafe_allow_html=True)
-                st.success(t('audio_ready', default='Audio ready!'))
-            else:
-                st.error(t('audio_error', default='Failed to generate audio'))
-    else:
-        st.info(t('audio_disabled', default='Audio responses are disabled'))
-
-def read_document(file_path: Path) -> Tuple[Optional[str], Dict[str, Any]]:
-    """Read PDF document (ethics-only version)"""
-    try:
-        if file_path.suffix.lower() == '.pdf':
-            return read_pdf(file_path)
-        else:
-            return None, {'error': f'Unsupported file type: {file_path.suffix}. Only PDF supported.'}
-    except Exception as e:
-        logger.error(f"Error reading document {file_path}: {e}")
-        return None, {'error': str(e)}
-
-def read_pdf(file_path: Path) -> Tuple[Optional[str], Dict[str, Any]]:
-    """Read PDF file and extract metadata"""
-    try:
-        reader = PdfReader(str(file_path))
-        text = ""
-        total_pages = len(reader.pages)
-        
-        for page_num, page in enumerate(reader.pages):
-            try:
-                page_text = page.extract_text()
-                if page_text and page_text.strip():
-                    text += f"\n--- Page {page_num + 1} ---\n"
-                    text += page_text
-            except Exception as e:
-                logger.warning(f"Error extracting text from page {page_num + 1}: {e}")
-                continue
-        
-        metadata = {
-            'total_pages': total_pages,
-            'file_size': file_path.stat().st_size,
-            'file_type': 'PDF',
-            'word_count': len(text.split()) if text else 0,
-            'character_count': len(text),
-        }
-        
-        return text, metadata
-        
-    except Exception as e:
-        logger.error(f"Error reading PDF {file_path.name}: {e}")
-        return None, {'error': str(e)}
-
-def render_sidebar():
-    """Render sidebar with controls"""
-    with st.sidebar:
-        # Language selector
-        st.markdown(f"🌐 {t('language_selector', default='Language')}")
-        render_language_selector()
-        
-        # DEBUG: Show current language
-        st.write(f"**{t('debug_current_language', default='Debug - Current Language')}:** {st.session_state.get('language', 'NOT SET')}")
-        
-        # Voice settings
-        render_voice_selector()
-        
-        st.markdown("---")
-        
-        # System status - Updated for file selector
-        st.markdown("📊 System Status")
-        
-        if ETHICS_AVAILABLE:
-            st.success("✅ Ethics System with File Selection Available")
-            
-            # Show which PDFs are available
-            from pathlib import Path
-            from ethics_handler import get_available_pdfs, EthicsConfig
-            
-            data_folder = Path("data")
-            available_pdfs = get_available_pdfs()
-            
-            if available_pdfs:
-                st.success(f"✅ Available Documents: {len(available_pdfs)}/{len(EthicsConfig.ETHICS_PDF_FILES)}")
-                for pdf in available_pdfs:
-                    display_name = EthicsConfig.PDF_DISPLAY_NAMES.get(pdf, pdf)
-                    st.write(f"   {display_name}")
-            
-            missing_pdfs = [pdf for pdf in EthicsConfig.ETHICS_PDF_FILES if pdf not in available_pdfs]
-            if missing_pdfs:
-                st.warning(f"⚠️ Missing Documents: {len(missing_pdfs)}")
-                for pdf in missing_pdfs:
-                    display_name = EthicsConfig.PDF_DISPLAY_NAMES.get(pdf, pdf)
-                    st.write(f"   ❌ {display_name}")
-        else:
-            st.error("❌ Ethics System Not Available")
-        
-        if OPENAI_API_KEY:
-            st.success("✅ AI Service Connected")
-        else:
-            st.error("❌ AI Service Not Available")
-        
-        st.markdown("---")
-        
-        # File selection info
-        if ETHICS_AVAILABLE:
-            st.markdown("📁 Document Selection")
-            st.info(t('file_selector_info', default='Use the document selector above to choose which ethics source to chat with, or select "All Documents" for comprehensive guidance.'))
-        
-        st.markdown("---")
-        
-        # Quick actions
-        st.markdown(f"⚡ {t('quick_actions', default='Quick Actions')}")
-        
-        if st.button(f"🗑️ {t('clear_all_chats', default='Clear All Chats')}", use_container_width=True, type="secondary"):
-            # Clear all chat sessions
-            keys_to_clear = [key for key in st.session_state.keys() if key.startswith('messages_') or key.startswith('audio_responses_')]
-            for key in keys_to_clear:
-                del st.session_state[key]
-            st.success(t('all_chats_cleared', default='All chat sessions cleared!'))
-            st.rerun()
-
-def get_simplified_css() -> str:
-    """Get simplified CSS for comprehensive ethics interface"""
-    base_css = """
-    <style>
-        /* Import Google Fonts */
-        @import url('https://fonts.googleapis.com/css2?family=Inter:wght@300;400;500;600;700&display=swap');
-        @import url('https://fonts.googleapis.com/css2?family=Noto+Sans+Arabic:wght@300;400;500;600;700&display=swap');
-        
-        /* Roehampton University Brand Colors - Updated for comprehensive ethics */
-    :root {
-        --roehampton-green: #2F4F6F;            /* Now Slate Blue */
-        --roehampton-dark-green: #1D2F3F;       /* Deep Navy */
-        --roehampton-light-green: #7A9EBB;      /* Muted Sky Blue */
-        --roehampton-navy: #BFD8E5;             /* Soft Pale Blue */
-        --roehampton-charcoal: #2B2F38;         /* Dark Charcoal */
-        --background-light: #F5F7FA;            /* Light Grey Background */
-        --background-white: #FFFFFF;            /* White */
-        --text-primary: #2B2F38;                /* Charcoal Text */
-        --text-secondary: #6C757D;              /* Soft Grey */
-        --border-color: #DDE3E9;                /* Light Blue-Grey Border */
-        --shadow: 0 2px 4px rgba(47, 79, 111, 0.08);
-        --shadow-lg: 0 8px 25px rgba(47, 79, 111, 0.12);
-        --accent-islamic: #008751;               /* Islamic Green */
-        --accent-modern: #6366F1;               /* Modern Purple */
-        }
-        
-        /* Global styling */
-        .main, .sidebar .sidebar-content {
-            font-family: 'Inter', 'Noto Sans Arabic', 'Arial', sans-serif !important;
-            background-color: var(--background-light);
-        }
-        
-        /* Arabic text support */
-        [lang="ar"], .arabic-text {
-            font-family: 'Noto Sans Arabic', 'Arial', 'Tahoma', sans-serif !important;
-            line-height: 1.8 !important;
-            text-align: right !important;
-        }
-        
-        /* Header styling - Enhanced for comprehensive ethics */
-        .ethics-header {
-            background: linear-gradient(135deg, var(--roehampton-green), var(--roehampton-dark-green), var(--accent-islamic));
-            padding: 2.5rem 2rem;
-            border-radius: 15px;
-            margin-bottom: 2rem;
-            color: white;
-            text-align: center;
-            box-shadow: var(--shadow-lg);
-            position: relative;
-            overflow: hidden;
-        }
-        
-        .ethics-header::before {
-            content: '';
-            position: absolute;
-            top: 0;
-            left: 0;
-            right: 0;
-            bottom: 0;
-            background: linear-gradient(45deg, rgba(0,135,81,0.1), rgba(99,102,241,0.1));
-            pointer-events: none;
-        }
-     
-        /* Chat interface prominence */
-        .chat-section {
-            background: var(--background-white);
-            border-radius: 15px;
-            padding: 2rem;
-            margin: 2rem 0;
-            border: 2px solid var(--roehampton-green);
-            box-shadow: var(--shadow-lg);
-        }
-        
-        .chat-welcome {
-            text-align: center;
-            padding: 2rem;
-            background: linear-gradient(135deg, #f0fdf9, #e8f5f0, #f3e8ff);
-            border-radius: 12px;
-            margin-bottom: 2rem;
-            border: 1px solid var(--roehampton-light-green);
-        }
-        
-        .chat-welcome h3 {
-            color: var(--roehampton-green);
-            margin-bottom: 1rem;
-        }
-        
-        .stChatInput > div {
-            border: 2px solid var(--roehampton-green) !important;
-            border-radius: 25px !important;
-            background: var(--background-white) !important;
-        }
-        
-        .logo-title-container {
-            display: flex;
-            align-items: center;
-            justify-content: center;
-            gap: 2rem;
-            margin-bottom: 1rem;
-            position: relative;
-            z-index: 1;
-        }
-        
-        .roehampton-logo {
-            height: 90px;
-            width: auto;
-            background: white;
-            padding: 0.75rem;
-            border-radius: 12px;
-            box-shadow: 0 4px 15px rgba(0,0,0,0.2);
-        }
-        
-        .ethics-header h1 {
-            margin: 0;
-            font-weight: 700;
-            font-size: 2.8rem;
-            text-shadow: 2px 2px 4px rgba(0,0,0,0.3);
-        }
-        
-        .ethics-header p {
-            margin: 0;
-            opacity: 0.95;
-            font-size: 1.3rem;
-            font-weight: 400;
-        }
-        
-        /* Multi-source indicator */
-        .source-indicator {
-            background: rgba(255,255,255,0.2);
-            padding: 0.5rem 1rem;
-            border-radius: 20px;
-            font-size: 0.9rem;
-            margin-top: 1rem;
-            display: inline-block;
-        }
-        
-        /* Button styling - Enhanced */
-        .stButton > button {
-            border-radius: 12px;
-            font-weight: 600;
-            transition: all 0.3s ease;
-            border: none;
-            font-size: 1.1rem;
-            padding: 0.8rem 1.5rem;
-        }
-        
-        .stButton > button[data-baseweb="button"][kind="primary"] {
-            background: linear-gradient(135deg, var(--roehampton-green), var(--accent-islamic));
-            color: white;
-            box-shadow: var(--shadow);
-        }
-        
-        .stButton > button[data-baseweb="button"][kind="primary"]:hover {
-            transform: translateY(-2px);
-            box-shadow: var(--shadow-lg);
-        }
-        
-        .stButton > button[data-baseweb="button"][kind="secondary"] {
-            background: white;
-            color: var(--roehampton-green);
-            border: 2px solid var(--roehampton-green);
-        }
-        
-        .stButton > button[data-baseweb="button"][kind="secondary"]:hover {
-            background: var(--roehampton-green);
-            color: white;
-            transform: translateY(-1px);
-        }
-        
-        /* Audio player styling */
-        .audio-player-container {
-            margin: 15px 0;
-            padding: 0;
-        }
-        
-        .audio-controls {
-            background: linear-gradient(135deg, var(--roehampton-green), var(--accent-islamic));
-            border-radius: 25px;
-            padding: 12px 20px;
-            display: flex;
-            align-items: center;
-            gap: 15px;
-            box-shadow: var(--shadow-lg);
-            transition: all 0.3s ease;
-        }
-        
-        .audio-controls:hover {
-            transform: translateY(-2px);
-            box-shadow: 0 6px 25px rgba(0, 135, 81, 0.3);
-        }
-        
-        /* Input styling */
-        .stTextInput > div > div > input {
-            border-radius: 10px;
-            border: 2px solid var(--border-color);
-            padding: 0.75rem 1rem;
-            font-size: 1rem;
-            transition: all 0.2s ease;
-        }
-        
-        .stTextInput > div > div > input:focus {
-            border-color: var(--roehampton-green);
-            box-shadow: 0 0 0 3px rgba(0, 135, 81, 0.1);
-        }
-        
-        /* Status indicators - Enhanced for multiple sources */
-        .status-success {
-            background: linear-gradient(135deg, var(--accent-islamic), var(--roehampton-green));
-            color: white;
-            padding: 0.6rem 1.2rem;
-            border-radius: 25px;
-            font-size: 0.9rem;
-            font-weight: 600;
-            display: inline-flex;
-            align-items: center;
-            gap: 0.5rem;
-            box-shadow: var(--shadow);
-        }
-        
-        .status-warning {
-            background: linear-gradient(135deg, #F59E0B, #D97706);
-            color: white;
-            padding: 0.6rem 1.2rem;
-            border-radius: 25px;
-            font-size: 0.9rem;
-            font-weight: 600;
-            display: inline-flex;
-            align-items: center;
-            gap: 0.5rem;
-        }
-        
-        .status-error {
-            background: linear-gradient(135deg, #E74C3C, #C0392B);
-            color: white;
-            padding: 0.6rem 1.2rem;
-            border-radius: 25px;
-            font-size: 0.9rem;
-            font-weight: 600;
-            display: inline-flex;
-            align-items: center;
-            gap: 0.5rem;
-        }
-        
-        /* PDF indicator badges */
-        .pdf-badge {
-            background: rgba(255,255,255,0.9);
-            color: var(--roehampton-green);
-            padding: 0.3rem 0.8rem;
-            border-radius: 15px;
-            font-size: 0.8rem;
-            font-weight: 600;
-            margin: 0.2rem;
-            display: inline-block;
-            box-shadow: var(--shadow);
-        }
-        
-        /* Reduce sidebar width */
-        .css-1d391kg {
-            width: 250px !important;
-        }
-
-        .css-1lcbmhc {
-            width: 250px !important;
-            min-width: 250px !important;
-        }
-
-        /* Reduce sidebar padding */
-        .css-1lcbmhc .css-1outpf7 {
-            padding-top: 5rem !important;
-            padding-left: 5rem !important;
-            padding-right: 5rem !important;
-        }
-
-        /* Compact sidebar sections */
-        .sidebar .block-container {
-            padding-top: 5rem !important;
-            padding-bottom: 5rem !important;
-        }
-        
-        /* Responsive design */
-        @media (max-width: 768px) {
-            .ethics-header h1 {
-                font-size: 2rem;
-            }
-            
-            .logo-title-container {
-                flex-direction: column;
-                gap: 1rem;
-            }
-            
-            .roehampton-logo {
-                height: 70px;
-            }
-        }
-    </style>
-    """
-    
-    # Add RTL support
-    from localization import get_rtl_css
-    rtl_css = get_rtl_css()
-    
-    return base_css + rtl_css
-
-def main():
-    """Ethics application with file selection feature"""
-    try:
-        # Initialize session state
-        initialize_session_state()
-        
-        # Apply CSS
-        st.markdown(get_simplified_css(), unsafe_allow_html=True)
-        
-        # Render sidebar
-        render_sidebar()
-        
-        # Main content
-        if not ETHICS_AVAILABLE:
-            st.error(t('ethics_system_not_available', default='❌ Ethics system with file selection is not available'))
-            st.info(t('ensure_ethics_files_selector', default="Please ensure 'ethics_handler.py' exists and the ethics PDF files are in your data folder."))
-            st.stop()
-        
-        # Load logo
-        logo_base64 = load_logo_from_assets()
-        
-        # Check PDF availability
-        from ethics_handler import get_available_pdfs, EthicsConfig
-        available_pdfs = get_available_pdfs()
-        
-        # Create PDF badges for available documents
-        pdf_badges = ""
-        for pdf in available_pdfs:
-            pdf_name = EthicsConfig.PDF_DISPLAY_NAMES.get(pdf, pdf.replace('.pdf', '').replace('_', ' ').title())
-            pdf_badges += f'<span class="pdf-badge">{pdf_name}</span>'
-        
-        if logo_base64:
-            st.markdown(f"""
-            <div class="ethics-header">
-                <div class="logo-title-container">
-                    <div>
-                        <h1>{t('ethics_file_selector_title', default='Trusteeship AI Ethics chatbot')}</h1>
-                    </div>
-                </div>
-                <p>{t('file_selector_subtitle', default='Choose specific documents or combine multiple sources for comprehensive ethical guidance')}</p>
-                <div class="source-indicator">
-                    📚 {len(available_pdfs)} {t('documents_available', default='documents available')} | 🎯 {t('selective_chat', default='Selective Chat Mode')}
-                </div>
-                <div style="margin-top: 1rem;">
-                    {pdf_badges}
-                </div>
-            </div>
-            """, unsafe_allow_html=True)
-        else:
-            st.markdown(f"""
-            <div class="ethics-header">
-                <h1>📋 {t('ethics_file_selector_title', default='Trusteeship AI Ethics chatbot')}</h1>
-                <p>{t('file_selector_subtitle', default='Choose specific documents or combine multiple sources for comprehensive ethical guidance')}</p>
-                <div class="source-indicator">
-                    📚 {len(available_pdfs)} {t('documents_available', default='documents available')} | 🎯 {t('selective_chat', default='Selective Chat Mode')}
-                </div>
-                <div style="margin-top: 1rem;">
-                    {pdf_badges}
-                </div>
-            </div>
-            """, unsafe_allow_html=True)
-        
-        # Show helpful information about the file selector feature
-        with st.expander(f"ℹ️ {t('how_file_selection_works', default='How Document Selection Works')}", expanded=False):
-            st.markdown(f"""
-            **{t('individual_documents', default='Individual Documents')}:**
-            - 📗 **Islamic Ethics (Volume 1)**: {t('islamic_vol1_desc', default='Core Islamic ethical principles and foundations')}
-            - 📘 **Islamic Ethics (Volume 2)**: {t('islamic_vol2_desc', default='Advanced Islamic ethical applications and cases')}
-            - 📙 **Reforming Modernity**: {t('reforming_desc', default='Contemporary ethical frameworks and modern perspectives')}
-            
-            **📚 {t('all_documents_combined', default='All Documents Combined')}**: {t('comprehensive_desc', default='Access all sources simultaneously for comprehensive, multi-perspective guidance')}
-            
-            **{t('benefits', default='Benefits')}:**
-            - 🎯 {t('focused_expertise', default='Get focused expertise from specific traditions')}
-            - 🔄 {t('easy_switching', default='Easily switch between different ethical perspectives')}
-            - 💬 {t('separate_conversations', default='Maintain separate conversation histories for each source')}
-            - 🔍 {t('comparative_analysis', default='Compare different approaches by chatting with multiple sources')}
-            """)
-        
-        # Show PDF status if some are missing
-        if len(available_pdfs) < len(Config.ETHICS_PDF_FILES):
-            missing_pdfs = [pdf for pdf in Config.ETHICS_PDF_FILES if pdf not in available_pdfs]
-            missing_display = [EthicsConfig.PDF_DISPLAY_NAMES.get(pdf, pdf) for pdf in missing_pdfs]
-            st.warning(f"⚠️ {t('some_documents_missing', default='Some documents are missing')}: {', '.join(missing_display)}")
-            st.info(t('app_works_with_available', default='The application will work with the available documents.'))
-        
-        if not available_pdfs:
-            st.error(t('no_documents_available', default='❌ No documents are available. Please add PDF files to the data folder.'))
-            st.stop()
-        
-        # Render ethics chat interface with file selection
-        render_ethics_chat_interface()
-        
-    except Exception as e:
-        logger.error(f"Application error: {e}")
-        st.error(f"🚨 **{t('application_error', default='Application Error')}**: {str(e)}")
-        
-        if st.checkbox(t('show_detailed_error', default='Show detailed error information')):
-            import traceback
-            st.code(traceback.format_exc())
-        
-        st.info(t('refresh_page', default='Please try refreshing the page or check your configuration.'))
-        
-        if st.button(f"🔄 {t('reset_application', default='Reset Application')}"):
-            for key in list(st.session_state.keys()):
-                del st.session_state[key]
-            st.rerun()
-
-if __name__ == '__main__':
+import streamlit as st
+from openai import OpenAI
+import atexit
+import functools
+import hashlib
+import httpx
+import mmap
+import os
+import tempfile
+import re
+from pathlib import Path
+from dotenv import load_dotenv
+from typing import Optional, Tuple, Dict, Any
+import logging
+import base64
+from zipfile import ZipFile
+
+# lxml iterparse is the fastest way through word/document.xml; fall back to
+# the stdlib parser when it is not installed
+try:
+    from lxml import etree as docx_etree
+    LXML_AVAILABLE = True
+except ImportError:
+    import xml.etree.ElementTree as docx_etree
+    LXML_AVAILABLE = False
+
+try:
+    from ethics_handler import render_ethics_chat_interface, initialize_ethics_session_state
+    ETHICS_AVAILABLE = True
+except ImportError as e:
+    ETHICS_AVAILABLE = False
+
+# PDF libraries are imported on first use: extraction results are cached at
+# several levels, so most reruns (and whole sessions on a warm cache) never
+# parse a PDF, and cold starts skip the native-library import cost.
+# PyMuPDF (fitz) extracts text in native code and is much faster than
+# PyPDF2; PyPDF2 stays as the pure-Python fallback for exotic PDFs.
+_fitz = None
+_fitz_checked = False
+
+def _get_fitz():
+    """Import PyMuPDF on first use; returns None when it is not installed"""
+    global _fitz, _fitz_checked
+    if not _fitz_checked:
+        _fitz_checked = True
+        try:
+            import fitz  # PyMuPDF
+            _fitz = fitz
+        except ImportError:
+            _fitz = None
+    return _fitz
+
+# Import our localization system
+from localization import language_manager, t, init_language_system, render_language_selector, get_rtl_css
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Load environment variables
+load_dotenv()
+
+# Configuration - Updated for multiple ethics PDFs
+class Config:
+    PROJECT_NAME = "Comprehensive Ethics Assistant"
+    COMPANY_NAME = "Ethics Center"
+    LOGO_PATH = "logo.png"
+    MAX_TOKENS = 1500
+    TEMPERATURE = 0.3
+    MODEL = "gpt-3.5-turbo"
+    TTS_MODEL = "tts-1"
+    TTS_VOICE = "alloy"
+    SUPPORTED_VOICES = {
+        'alloy': 'Alloy (Neutral)',
+        'echo': 'Echo (Male)', 
+        'fable': 'Fable (British Male)',
+        'onyx': 'Onyx (Deep Male)',
+        'nova': 'Nova (Female)',
+        'shimmer': 'Shimmer (Soft Female)'
+    }
+    # Multiple ethics PDFs configuration
+    ETHICS_PDF_FILES = [
+        "Islamic_Ethics.pdf",
+        "Islamic_Ethics2.pdf",
+        "reforming_modernity.pdf"
+    ]
+
+# Voice list is static; build it once instead of per rerun in the selector
+_VOICE_OPTIONS = list(Config.SUPPORTED_VOICES)
+
+# Initialize OpenAI with a tuned, shared connection pool: keep-alive reuse
+# avoids paying a TCP+TLS handshake on every chat/TTS call
+OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+if OPENAI_API_KEY:
+    client = OpenAI(
+        api_key=OPENAI_API_KEY,
+        http_client=httpx.Client(
+            limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+            timeout=httpx.Timeout(30.0, connect=5.0),
+        ),
+    )
+    atexit.register(client.close)
+else:
+    client = None
+
+@st.cache_resource(show_spinner=False)
+def load_logo_from_assets() -> Optional[str]:
+    """Load logo from assets folder and encode as base64.
+
+    Cached with st.cache_resource: the logo never changes at runtime, so
+    the path probing, file read, and base64 encode happen once per process
+    instead of on every rerun.
+    """
+    possible_paths = [
+        Path("assets") / "logo.png",
+        Path("assets") / "logo.jpg", 
+        Path("assets") / "logo.jpeg",
+        Path("assets") / "logo.svg",
+        Path("assets") / "roehampton_logo.png",
+        Path("assets") / "university_logo.png"
+    ]
+    
+    for logo_path in possible_paths:
+        if logo_path.exists():
+            try:
+                with open(logo_path, "rb") as img_file:
+                    img_bytes = img_file.read()
+                    img_base64 = base64.b64encode(img_bytes).decode()
+                    logger.info("Successfully loaded logo from: %s", logo_path)
+                    return img_base64
+            except Exception as e:
+                logger.warning("Error loading logo from %s: %s", logo_path, e)
+                continue
+    
+    logger.info("No logo found in assets folder")
+    return None 
+
+# Page configuration
+st.set_page_config(
+    page_title=Config.PROJECT_NAME,
+    page_icon="📋",
+    layout="wide",
+    initial_sidebar_state="expanded",
+    menu_items={
+        'Get Help': None,
+        'Report a bug': None,
+        'About': f"# {Config.PROJECT_NAME}\nComprehensive ethics guidance from Islamic and contemporary perspectives"
+    }
+)
+
+# Session-state defaults as (key, factory) pairs: one setdefault loop
+# replaces a chain of membership checks, and adding a key is a single line.
+# Factories keep mutable defaults per-session. Includes the dummy
+# authentication data expected by the ethics handler.
+_SESSION_DEFAULTS = (
+    ('audio_enabled', lambda: True),
+    ('selected_voice', lambda: Config.TTS_VOICE),
+    ('audio_responses', dict),
+    ('student_id', lambda: "ETHICS_USER"),
+    ('student_data', lambda: {
+        'programme': 'Comprehensive Ethics Assistant',
+        'code': 'ETHICS'
+    }),
+)
+
+def initialize_session_state() -> None:
+    """Initialize session state for ethics chat"""
+    for key, factory in _SESSION_DEFAULTS:
+        if key not in st.session_state:
+            st.session_state[key] = factory()
+
+    # Initialize ethics session state if available
+    if ETHICS_AVAILABLE:
+        initialize_ethics_session_state()
+
+    # Initialize language system
+    init_language_system()
+
+# Background executor for TTS so synthesis doesn't block the script thread;
+# lazily created to avoid spinning up threads for sessions with audio off
+_tts_executor = None
+
+def _get_tts_executor():
+    global _tts_executor
+    if _tts_executor is None:
+        from concurrent.futures import ThreadPoolExecutor
+        _tts_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="tts")
+        atexit.register(_tts_executor.shutdown, wait=False)
+    return _tts_executor
+
+def generate_audio_response_async(text: str, voice: str = None):
+    """Submit TTS generation to the background executor and return a Future.
+
+    The caller stores the Future where the audio bytes would go and resolves
+    it on a later rerun, so the user can keep interacting while the speech
+    is synthesized instead of waiting behind a spinner.
+    """
+    selected_voice = voice or st.session_state.get('selected_voice', Config.TTS_VOICE)
+    return _get_tts_executor().submit(generate_audio_response, text, selected_voice)
+
+def submit_tts_segment(text: str, voice: str):
+    """Submit one response segment for background synthesis, returning a Future.
+
+    Used by the streaming chat path to start synthesizing completed
+    sentences while later tokens are still arriving, so audio generation
+    overlaps the chat completion instead of starting after it.
+    """
+    return _get_tts_executor().submit(generate_audio_response, text, voice)
+
+def _join_tts_segments(futures: list, full_text: str, voice: str) -> Optional[bytes]:
+    """Wait for streamed segment futures and concatenate their MP3 bytes.
+
+    OpenAI's MP3 frames concatenate into a playable stream; the joined
+    audio is written to the full-text cache entry so later history
+    replays hit it directly. If any segment failed, fall back to one
+    synthesis of the whole text.
+    """
+    segments = []
+    for future in futures:
+        try:
+            segments.append(future.result())
+        except Exception as e:
+            logger.error("Streamed TTS segment failed: %s", e)
+            segments.append(None)
+
+    if not segments or not all(segments):
+        return generate_audio_response(full_text, voice)
+
+    audio_bytes = b"".join(segments)
+    clean_text = clean_text_for_tts(full_text)
+    cache_path = _tts_cache_path(clean_text, voice)
+    try:
+        TTS_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=TTS_CACHE_DIR, suffix=".tmp")
+        with os.fdopen(fd, 'wb') as f:
+            f.write(audio_bytes)
+        os.replace(tmp_name, cache_path)
+    except OSError as e:
+        logger.warning("Could not cache TTS audio: %s", e)
+    _tts_memo_put((clean_text, voice), audio_bytes)
+    return audio_bytes
+
+def join_tts_segments_async(futures: list, full_text: str, voice: str):
+    """Join streamed TTS segments in the background, returning a Future.
+
+    Safe to run on the shared executor: the segment futures were enqueued
+    before this task, so FIFO scheduling guarantees they all start (and
+    finish independently) before or while the join waits.
+    """
+    return _get_tts_executor().submit(_join_tts_segments, futures, full_text, voice)
+
+# Sentence boundaries for chunked TTS synthesis
+_SENTENCE_SPLIT_RE = re.compile(r'(?<=[.!?])\s+')
+
+def _chunk_sentences(text: str, target: int = 400) -> list:
+    """Group sentences into chunks of roughly `target` characters each"""
+    chunks = []
+    current = []
+    current_len = 0
+    for sentence in _SENTENCE_SPLIT_RE.split(text):
+        if current and current_len + len(sentence) > target:
+            chunks.append(' '.join(current))
+            current = []
+            current_len = 0
+        current.append(sentence)
+        current_len += len(sentence) + 1
+    if current:
+        chunks.append(' '.join(current))
+    return chunks
+
+# On-disk TTS cache, sibling of the extraction cache in .cache/docs: the
+# same response text always yields the same speech, so repeat requests are
+# a file read instead of a 200-800ms OpenAI round trip
+TTS_CACHE_DIR = Path(".cache") / "tts"
+
+def _tts_cache_path(clean_text: str, voice: str) -> Path:
+    key = hashlib.blake2b(clean_text.encode(), digest_size=16).hexdigest()
+    return TTS_CACHE_DIR / f"{key}_{voice}.mp3"
+
+# In-process memo layered over the disk cache: replaying the same response in
+# one process (e.g. re-rendering history) skips even the file read. Bounded
+# by evicting the oldest entry; only successful synthesis is memoized so a
+# transient failure never pins a None.
+_TTS_MEMO: Dict[Tuple[str, str], bytes] = {}
+_TTS_MEMO_MAX = 64
+
+def _tts_memo_put(memo_key: Tuple[str, str], audio_bytes: bytes) -> None:
+    if len(_TTS_MEMO) >= _TTS_MEMO_MAX:
+        _TTS_MEMO.pop(next(iter(_TTS_MEMO)))
+    _TTS_MEMO[memo_key] = audio_bytes
+
+def generate_audio_response(text: str, voice: str = None) -> Optional[bytes]:
+    """Generate audio response using OpenAI TTS"""
+    if not client:
+        logger.error("OpenAI client not initialized")
+        return None
+
+    if not text or text.isspace():
+        logger.error("No text provided for audio generation")
+        return None
+
+    # Clean text for TTS
+    clean_text = clean_text_for_tts(text)
+    selected_voice = voice or st.session_state.get('selected_voice', Config.TTS_VOICE)
+
+    memo_key = (clean_text, selected_voice)
+    memoized = _TTS_MEMO.get(memo_key)
+    if memoized is not None:
+        return memoized
+
+    cache_path = _tts_cache_path(clean_text, selected_voice)
+    try:
+        if cache_path.exists():
+            audio_bytes = cache_path.read_bytes()
+            _tts_memo_put(memo_key, audio_bytes)
+            return audio_bytes
+    except OSError as e:
+        logger.warning("TTS cache lookup failed: %s", e)
+
+    # Long answers: synthesis time grows with text length, so split at
+    # sentence boundaries and synthesize the chunks concurrently — the whole
+    # answer costs roughly one round trip. OpenAI's MP3 frames concatenate
+    # into a playable stream.
+    if len(clean_text) > 600:
+        chunks = _chunk_sentences(clean_text)
+        if len(chunks) > 1:
+            results = generate_audio_responses_batch(chunks, selected_voice)
+            if results and all(results):
+                audio_bytes = b"".join(results)
+                try:
+                    TTS_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+                    fd, tmp_name = tempfile.mkstemp(dir=TTS_CACHE_DIR, suffix=".tmp")
+                    with os.fdopen(fd, 'wb') as f:
+                        f.write(audio_bytes)
+                    os.replace(tmp_name, cache_path)
+                except OSError as e:
+                    logger.warning("Could not cache TTS audio: %s", e)
+                _tts_memo_put(memo_key, audio_bytes)
+                return audio_bytes
+            logger.warning("Chunked TTS synthesis incomplete, falling back to a single request")
+
+    try:
+        # Stream the response body as the server produces it: the download
+        # overlaps synthesis instead of waiting for the complete MP3 before
+        # the first byte moves. st.audio needs complete bytes (no
+        # progressive playback), so the chunks are still collected.
+        chunks = []
+        with client.audio.speech.with_streaming_response.create(
+            model=Config.TTS_MODEL,
+            voice=selected_voice,
+            input=clean_text,
+            response_format="mp3"
+        ) as response:
+            for chunk in response.iter_bytes(8192):
+                chunks.append(chunk)
+        audio_bytes = b"".join(chunks)
+    except Exception as e:
+        logger.error("Error generating audio: %s", e)
+        return None
+    try:
+        TTS_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        # Write via tempfile + rename so concurrent readers never see a partial file
+        fd, tmp_name = tempfile.mkstemp(dir=TTS_CACHE_DIR, suffix=".tmp")
+        with os.fdopen(fd, 'wb') as f:
+            f.write(audio_bytes)
+        os.replace(tmp_name, cache_path)
+    except OSError as e:
+        logger.warning("Could not cache TTS audio: %s", e)
+    _tts_memo_put(memo_key, audio_bytes)
+    return audio_bytes
+
+async def _gather_tts_responses(texts: list, voice: str) -> list:
+    """Issue several TTS requests concurrently over one async connection pool.
+
+    The client is created inside this coroutine (i.e. inside the event loop
+    asyncio.run started for the batch) and closed before the loop ends:
+    httpx keep-alive connections belong to the loop that opened them, so a
+    client shared across asyncio.run calls breaks on the second batch.
+    """
+    from ethics_handler import make_async_openai_client
+    aclient = make_async_openai_client()
+    if not aclient:
+        return [None] * len(texts)
+
+    async def one(text: str) -> Optional[bytes]:
+        clean_text = clean_text_for_tts(text)
+        memo_key = (clean_text, voice)
+        memoized = _TTS_MEMO.get(memo_key)
+        if memoized is not None:
+            return memoized
+        cache_path = _tts_cache_path(clean_text, voice)
+        try:
+            if cache_path.exists():
+                audio_bytes = cache_path.read_bytes()
+                _tts_memo_put(memo_key, audio_bytes)
+                return audio_bytes
+        except OSError as e:
+            logger.warning("TTS cache lookup failed: %s", e)
+        try:
+            response = await aclient.audio.speech.create(
+                model=Config.TTS_MODEL,
+                voice=voice,
+                input=clean_text,
+                response_format="mp3"
+            )
+        except Exception as e:
+            logger.error("Error generating audio: %s", e)
+            return None
+        audio_bytes = response.content
+        try:
+            TTS_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+            fd, tmp_name = tempfile.mkstemp(dir=TTS_CACHE_DIR, suffix=".tmp")
+            with os.fdopen(fd, 'wb') as f:
+                f.write(audio_bytes)
+            os.replace(tmp_name, cache_path)
+        except OSError as e:
+            logger.warning("Could not cache TTS audio: %s", e)
+        _tts_memo_put(memo_key, audio_bytes)
+        return audio_bytes
+
+    import asyncio
+    try:
+        return await asyncio.gather(*[one(t) for t in texts])
+    finally:
+        await aclient.close()
+
+def generate_audio_responses_batch(texts: list, voice: str = None) -> list:
+    """Generate audio for several texts concurrently.
+
+    One blocking speech.create per message serializes N messages behind N
+    round trips; fanning them out through the shared AsyncOpenAI client
+    costs roughly one round trip for the whole batch. Failed items come
+    back as None in the result list.
+    """
+    if not texts:
+        return []
+    selected_voice = voice or st.session_state.get('selected_voice', Config.TTS_VOICE)
+    if len(texts) == 1:
+        return [generate_audio_response(texts[0], selected_voice)]
+    import asyncio
+    try:
+        return asyncio.run(_gather_tts_responses(texts, selected_voice))
+    except Exception as e:
+        logger.error(f"Concurrent audio generation failed, falling back to serial: {e}")
+        return [generate_audio_response(t, selected_voice) for t in texts]
+
+# Single C-level pass over the text: strip UI emojis and normalize the smart
+# punctuation some voices read aloud (str.translate only handles 1:1 mappings,
+# so the ellipsis is replaced separately in clean_text_for_tts)
+_TTS_CHAR_TABLE = str.maketrans({
+    0x2019: "'",   # right single quote
+    0x2018: "'",   # left single quote
+    0x201C: '"',   # left double quote
+    0x201D: '"',   # right double quote
+    0x2013: '-',   # en dash
+    0x2014: '-',   # em dash
+    **{ord(c): None for c in '🔑📄📚⚠️❌✅🤖🙋📊💾⏱️🔧🗑️🔄🔍🚨📁🎓📋🆔🔐'},
+})
+
+# Precompiled markdown-stripping patterns: compiled once at import instead
+# of re-parsed (or fetched from re's pattern cache) nine times per TTS call
+_MD_BOLD_RE = re.compile(r'\*\*(.*?)\*\*')
+_MD_ITALIC_RE = re.compile(r'\*(.*?)\*')
+_MD_UNDERSCORE_RE = re.compile(r'_(.*?)_')
+_MD_HEADER_RE = re.compile(r'^#+\s*', re.MULTILINE)
+_MD_CODE_BLOCK_RE = re.compile(r'```.*?```', re.DOTALL)
+_MD_INLINE_CODE_RE = re.compile(r'`([^`]+)`')
+_MD_LINK_RE = re.compile(r'\[([^\]]+)\]\([^\)]+\)')
+
+# Precompiled whitespace patterns: one pass turns newline runs (and their
+# surrounding spaces) into sentence breaks, one pass collapses space runs
+_NEWLINE_RUN_RE = re.compile(r'\s*\n\s*')
+_SPACE_RUN_RE = re.compile(r'[ \t]+')
+
+def clean_text_for_tts(text: str) -> str:
+    """Clean text for text-to-speech by removing markdown and formatting"""
+    if not text:
+        return ""
+
+    # Remove markdown formatting
+    text = _MD_BOLD_RE.sub(r'\1', text)           # **bold**
+    text = _MD_ITALIC_RE.sub(r'\1', text)         # *italic*
+    text = _MD_UNDERSCORE_RE.sub(r'\1', text)     # _italic_
+    text = _MD_HEADER_RE.sub('', text)            # headers
+    text = _MD_CODE_BLOCK_RE.sub('', text)        # code blocks
+    text = _MD_INLINE_CODE_RE.sub(r'\1', text)    # inline code
+    text = _MD_LINK_RE.sub(r'\1', text)           # links
+    
+    # Remove emojis and normalize smart punctuation in one translate pass
+    text = text.translate(_TTS_CHAR_TABLE)
+    text = text.replace('…', '...')
+    
+    # Clean up spaces and line breaks
+    text = _NEWLINE_RUN_RE.sub('. ', text)
+    text = _SPACE_RUN_RE.sub(' ', text)
+    
+    # Ensure proper sentence ending
+    text = text.strip()
+    if text and not text.endswith(('.', '!', '?')):
+        text += '.'
+    
+    return text
+
+def render_audio_player(audio_bytes: bytes, key: str = None) -> None:
+    """Render an audio player for the given MP3 bytes.
+
+    Uses the native st.audio widget, which serves the bytes through the
+    media file manager with range-request support, instead of inlining a
+    base64 data URI into the DOM — that cost a re-encode plus ~33% size
+    overhead on every rerun for each message.
+    """
+    if not audio_bytes:
+        return
+
+    st.html(
+        '<div style="color: #667eea; font-weight: 500; font-size: 14px; margin: 10px 0 0;">'
+        f"🔊 {t('audio_response', default='Audio Response')}</div>"
+    )
+    st.audio(audio_bytes, format='audio/mp3')
+
+def render_voice_selector():
+    """Render voice selector in sidebar"""
+    st.markdown(f"🎤 {t('voice_settings', default='Voice Settings')}")
+    
+    # Audio toggle
+    current_audio_state = st.session_state.get('audio_enabled', True)
+    audio_enabled = st.checkbox(
+        f"🔊 {t('enable_audio', default='Enable Audio Responses')}", 
+        value=current_audio_state,
+        help=t('audio_help', default='Toggle audio responses for accessibility')
+    )
+    st.session_state.audio_enabled = audio_enabled
+    
+    if audio_enabled:
+        # Voice selection
+        voice_options = _VOICE_OPTIONS
+        current_voice = st.session_state.get('selected_voice', Config.TTS_VOICE)
+        
+        try:
+            current_index = voice_options.index(current_voice)
+        except ValueError:
+            current_index = 0
+        
+        selected_voice = st.selectbox(
+            f"🎭 {t('select_voice', default='Select Voice')}", 
+            options=voice_options,
+            format_func=lambda x: Config.SUPPORTED_VOICES[x],
+            index=current_index,
+            help=t('voice_help', default='Choose the voice for audio responses')
+        )
+        
+        st.session_state.selected_voice = selected_voice
+        
+        # Test voice button
+        if st.button(f"🎵 {t('test_voice', default='Test Voice')}", type="secondary"):
+            test_text = t('test_audio_text', default='Hello! This is how I will sound when reading responses to you.')
+            
+            with st.spinner(t('generating_audio', default='Generating audio...')):
+                audio_bytes = generate_audio_response(test_text, selected_voice)
+                
+            if audio_bytes:
+                render_audio_player(audio_bytes, key="voice_test")
+                st.success(t('audio_ready', default='Audio ready!'))
+            else:
+                st.error(t('audio_error', default='Failed to generate audio'))
+    else:
+        st.info(t('audio_disabled', default='Audio responses are disabled'))
+
+def read_document(file_path: Path, metadata_only: bool = False) -> Tuple[Optional[str], Dict[str, Any]]:
+    """Read a supported document (PDF or DOCX)"""
+    try:
+        extractor = _EXTRACTORS.get(file_path.suffix.lower())
+        if extractor is None:
+            return None, {'error': f'Unsupported file type: {file_path.suffix}. Only PDF and DOCX supported.'}
+        return extractor(file_path, metadata_only=metadata_only)
+    except Exception as e:
+        logger.error("Error reading document %s: %s", file_path, e)
+        return None, {'error': str(e)}
+
+def read_pdf_with_pymupdf(file_path: Path) -> Tuple[str, int]:
+    """Extract PDF text using PyMuPDF (fast native extraction)"""
+    doc = _get_fitz().open(str(file_path))
+    try:
+        parts = []
+        total_pages = doc.page_count
+
+        for page_num, page in enumerate(doc):
+            page_text = page.get_text("text")
+            if page_text and not page_text.isspace():
+                parts.append(f"\n--- Page {page_num + 1} ---\n")
+                parts.append(page_text)
+
+        return "".join(parts), total_pages
+    finally:
+        doc.close()
+
+def _iter_pdf_pages(reader):
+    """Yield (page_num, page_text) for pages with extractable text.
+
+    Generator so callers can stop early (or never extract at all) without
+    materializing the whole document; extraction errors skip the page.
+    """
+    for page_num, page in enumerate(reader.pages):
+        try:
+            page_text = page.extract_text()
+        except Exception as e:
+            logger.warning("Error extracting text from page %d: %s", page_num + 1, e)
+            continue
+        if page_text and not page_text.isspace():
+            yield page_num, page_text
+
+def read_pdf_with_pypdf2(file_path: Path) -> Tuple[str, int]:
+    """Extract PDF text using PyPDF2 (pure-Python fallback)"""
+    from PyPDF2 import PdfReader
+
+    # Memory-map the file so the kernel pages in only what PyPDF2 touches
+    with open(file_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        # PDF parsing jumps around via the xref table, so ask the kernel to
+        # prefetch the whole map up front where madvise is available
+        if hasattr(mmap, 'MADV_WILLNEED'):
+            mapped.madvise(mmap.MADV_WILLNEED)
+        # strict=False skips PyPDF2's extra validation branches per object
+        # resolution; malformed structures degrade to warnings instead
+        reader = PdfReader(mapped, strict=False)
+        parts = []
+        total_pages = len(reader.pages)
+
+        for page_num, page_text in _iter_pdf_pages(reader):
+            parts.append(f"\n--- Page {page_num + 1} ---\n")
+            parts.append(page_text)
+
+    return "".join(parts), total_pages
+
+def read_pdf(file_path: Path, metadata_only: bool = False) -> Tuple[Optional[str], Dict[str, Any]]:
+    """Read PDF file and extract metadata.
+
+    With metadata_only, skip text extraction entirely: the page count comes
+    from the document catalog and the size from one stat, so listing a large
+    corpus costs milliseconds regardless of document length.
+    """
+    try:
+        text = None
+        total_pages = 0
+
+        if metadata_only:
+            fitz = _get_fitz()
+            if fitz:
+                doc = fitz.open(str(file_path))
+                try:
+                    total_pages = doc.page_count
+                finally:
+                    doc.close()
+            else:
+                from PyPDF2 import PdfReader
+                with open(file_path, 'rb') as f:
+                    total_pages = len(PdfReader(f, strict=False).pages)
+            return None, {
+                'total_pages': total_pages,
+                'file_size': file_path.stat().st_size,
+                'file_type': 'PDF',
+            }
+
+        if _get_fitz():
+            try:
+                text, total_pages = read_pdf_with_pymupdf(file_path)
+            except Exception as e:
+                logger.warning("PyMuPDF failed for %s, falling back to PyPDF2: %s", file_path.name, e)
+                text = None
+
+        if text is None:
+            text, total_pages = read_pdf_with_pypdf2(file_path)
+
+        metadata = {
+            'total_pages': total_pages,
+            'file_size': file_path.stat().st_size,
+            'file_type': 'PDF',
+            'word_count': len(text.split()) if text else 0,
+            'character_count': len(text),
+        }
+        
+        return text, metadata
+        
+    except Exception as e:
+        logger.error("Error reading PDF %s: %s", file_path.name, e)
+        return None, {'error': str(e)}
+
+# WordprocessingML tags for text runs and paragraph boundaries
+_DOCX_T_TAG = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}t'
+_DOCX_P_TAG = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}p'
+
+def read_docx(file_path: Path, metadata_only: bool = False) -> Tuple[Optional[str], Dict[str, Any]]:
+    """Read DOCX file in a single streaming XML pass and extract metadata
+
+    Reads word/document.xml directly instead of walking the python-docx DOM:
+    one iterparse pass collects text runs and paragraph breaks, and clearing
+    elements as they complete keeps peak memory flat on large documents.
+    With metadata_only, return after a single stat without opening the
+    archive at all.
+    """
+    try:
+        if metadata_only:
+            return None, {
+                'file_size': file_path.stat().st_size,
+                'file_type': 'DOCX',
+            }
+
+        parts = []
+        with ZipFile(str(file_path)) as archive, archive.open('word/document.xml') as document_xml:
+            if LXML_AVAILABLE:
+                for _, element in docx_etree.iterparse(document_xml, tag=(_DOCX_T_TAG, _DOCX_P_TAG)):
+                    if element.tag == _DOCX_T_TAG and element.text:
+                        parts.append(element.text)
+                    elif element.tag == _DOCX_P_TAG:
+                        parts.append('\n')
+                    element.clear()
+            else:
+                for _, element in docx_etree.iterparse(document_xml):
+                    if element.tag == _DOCX_T_TAG and element.text:
+                        parts.append(element.text)
+                    elif element.tag == _DOCX_P_TAG:
+                        parts.append('\n')
+                    element.clear()
+
+        text = ''.join(parts).strip()
+
+        metadata = {
+            'file_size': file_path.stat().st_size,
+            'file_type': 'DOCX',
+            'word_count': len(text.split()) if text else 0,
+            'character_count': len(text),
+        }
+
+        return text, metadata
+
+    except Exception as e:
+        logger.error("Error reading DOCX %s: %s", file_path.name, e)
+        return None, {'error': str(e)}
+
+# Extension -> extractor dispatch table (pre-lowercased suffixes); supporting
+# a new format is a one-line addition here
+_EXTRACTORS = {
+    '.pdf': read_pdf,
+    '.docx': read_docx,
+}
+
+@functools.lru_cache(maxsize=8)
+def _build_sidebar_doc_lists(available_pdfs: Tuple[str, ...]) -> Tuple[str, str]:
+    """Pre-render the available/missing document lists for the sidebar.
+
+    One st.write per document meant N frontend elements per rerun; joining
+    the display names into two strings collapses each list to a single
+    element, rebuilt only when the available set changes.
+    """
+    from ethics_handler import EthicsConfig
+
+    available_lines = "  \n".join(
+        f"&nbsp;&nbsp;&nbsp;{EthicsConfig.PDF_DISPLAY_NAMES.get(pdf, pdf)}"
+        for pdf in available_pdfs
+    )
+    missing_lines = "  \n".join(
+        f"&nbsp;&nbsp;&nbsp;❌ {EthicsConfig.PDF_DISPLAY_NAMES.get(pdf, pdf)}"
+        for pdf in EthicsConfig.ETHICS_PDF_FILES if pdf not in available_pdfs
+    )
+    return available_lines, missing_lines
+
+def render_sidebar():
+    """Render sidebar with controls"""
+    with st.sidebar:
+        # Language selector
+        st.markdown(f"🌐 {t('language_selector', default='Language')}")
+        render_language_selector()
+        
+        # DEBUG: Show current language
+        st.write(f"**{t('debug_current_language', default='Debug - Current Language')}:** {st.session_state.get('language', 'NOT SET')}")
+        
+        # Voice settings
+        render_voice_selector()
+        
+        st.markdown("---")
+        
+        # System status - Updated for file selector
+        st.markdown("📊 System Status")
+        
+        if ETHICS_AVAILABLE:
+            st.success("✅ Ethics System with File Selection Available")
+            
+            # Show which PDFs are available
+            from ethics_handler import get_available_pdfs, EthicsConfig
+
+            available_pdfs = get_available_pdfs()
+            
+            available_lines, missing_lines = _build_sidebar_doc_lists(tuple(available_pdfs))
+
+            if available_pdfs:
+                st.success(f"✅ Available Documents: {len(available_pdfs)}/{len(EthicsConfig.ETHICS_PDF_FILES)}")
+                st.markdown(available_lines)
+
+            missing_count = len(EthicsConfig.ETHICS_PDF_FILES) - len(available_pdfs)
+            if missing_count:
+                st.warning(f"⚠️ Missing Documents: {missing_count}")
+                st.markdown(missing_lines)
+        else:
+            st.error("❌ Ethics System Not Available")
+        
+        if OPENAI_API_KEY:
+            st.success("✅ AI Service Connected")
+        else:
+            st.error("❌ AI Service Not Available")
+        
+        st.markdown("---")
+        
+        # File selection info
+        if ETHICS_AVAILABLE:
+            st.markdown("📁 Document Selection")
+            st.info(t('file_selector_info', default='Use the document selector above to choose which ethics source to chat with, or select "All Documents" for comprehensive guidance.'))
+        
+        st.markdown("---")
+        
+        # Quick actions
+        st.markdown(f"⚡ {t('quick_actions', default='Quick Actions')}")
+        
+        if st.button(f"🗑️ {t('clear_all_chats', default='Clear All Chats')}", use_container_width=True, type="secondary"):
+            # Clear all chat sessions
+            keys_to_clear = [key for key in st.session_state if key.startswith(('messages_', 'audio_responses_'))]
+            for key in keys_to_clear:
+                del st.session_state[key]
+            st.success(t('all_chats_cleared', default='All chat sessions cleared!'))
+            st.rerun()
+
+# Static CSS is read once at import time; only the RTL portion can vary per
+# rerun, so reruns no longer rebuild the whole style block
+_STATIC_CSS = "<style>\n" + (Path(__file__).parent / "static" / "app.css").read_text(encoding="utf-8") + "</style>"
+
+@functools.lru_cache(maxsize=8)
+def _assemble_css(lang: str) -> str:
+    """Concatenate the static stylesheet with the language's RTL block once;
+    lang keys the cache because get_rtl_css depends on the active language"""
+    return _STATIC_CSS + get_rtl_css()
+
+def get_simplified_css() -> str:
+    """Get simplified CSS for comprehensive ethics interface"""
+    return _assemble_css(st.session_state.get('language', 'en'))
+
+@functools.lru_cache(maxsize=16)
+def build_header_html(lang: str, available_pdfs: Tuple[str, ...], has_logo: bool) -> str:
+    """Build the page-header HTML once per (language, corpus, logo) combo.
+
+    Its only variable parts are translated labels and the PDF badges, so
+    reruns resolve to a cached string instead of re-interpolating the
+    f-string and badge loop every time. `lang` is part of the key so a
+    language switch rebuilds with the right translations.
+    """
+    from ethics_handler import EthicsConfig
+
+    pdf_badges = "".join(
+        f'<span class="pdf-badge">{EthicsConfig.PDF_DISPLAY_NAMES.get(pdf, pdf.replace(".pdf", "").replace("_", " ").title())}</span>'
+        for pdf in available_pdfs
+    )
+
+    title = t('ethics_file_selector_title', default='Trusteeship AI Ethics chatbot')
+    if has_logo:
+        heading = f"""
+            <div class="logo-title-container">
+                <div>
+                    <h1>{title}</h1>
+                </div>
+            </div>"""
+    else:
+        heading = f"""
+            <h1>📋 {title}</h1>"""
+
+    return f"""
+        <div class="ethics-header">{heading}
+            <p>{t('file_selector_subtitle', default='Choose specific documents or combine multiple sources for comprehensive ethical guidance')}</p>
+            <div class="source-indicator">
+                📚 {len(available_pdfs)} {t('documents_available', default='documents available')} | 🎯 {t('selective_chat', default='Selective Chat Mode')}
+            </div>
+            <div style="margin-top: 1rem;">
+                {pdf_badges}
+            </div>
+        </div>
+        """
+
+@functools.lru_cache(maxsize=16)
+def build_missing_docs_warning(lang: str, available_pdfs: Tuple[str, ...]) -> str:
+    """Build the missing-documents warning once per (language, corpus).
+
+    The list comprehensions and join over the configured corpus produced
+    the same string on every rerun; like the header, it only changes when
+    the language or the set of available PDFs does.
+    """
+    from ethics_handler import EthicsConfig
+
+    missing_pdfs = [pdf for pdf in Config.ETHICS_PDF_FILES if pdf not in available_pdfs]
+    missing_display = [EthicsConfig.PDF_DISPLAY_NAMES.get(pdf, pdf) for pdf in missing_pdfs]
+    return f"⚠️ {t('some_documents_missing', default='Some documents are missing')}: {', '.join(missing_display)}"
+
+def main():
+    """Ethics application with file selection feature"""
+    try:
+        # Initialize session state
+        initialize_session_state()
+        
+        # Apply CSS (st.html skips the frontend markdown pass for raw HTML).
+        # This must be re-emitted on app-level reruns — Streamlit drops
+        # elements that a run does not recreate — but chat interactions run
+        # inside the fragment and never replay this payload
+        st.html(get_simplified_css())
+        
+        # Render sidebar
+        render_sidebar()
+        
+        # Main content
+        if not ETHICS_AVAILABLE:
+            st.error(t('ethics_system_not_available', default='❌ Ethics system with file selection is not available'))
+            st.info(t('ensure_ethics_files_selector', default="Please ensure 'ethics_handler.py' exists and the ethics PDF files are in your data folder."))
+            st.stop()
+        
+        # Load logo
+        logo_base64 = load_logo_from_assets()
+        
+        # Check PDF availability
+        from ethics_handler import get_available_pdfs
+        available_pdfs = get_available_pdfs()
+
+        # Header HTML is cached per (language, corpus, logo) combination
+        st.html(build_header_html(
+            st.session_state.get('language', 'en'),
+            tuple(available_pdfs),
+            bool(logo_base64)
+        ))
+
+        # Show helpful information about the file selector feature
+        with st.expander(f"ℹ️ {t('how_file_selection_works', default='How Document Selection Works')}", expanded=False):
+            st.markdown(f"""
+            **{t('individual_documents', default='Individual Documents')}:**
+            - 📗 **Islamic Ethics (Volume 1)**: {t('islamic_vol1_desc', default='Core Islamic ethical principles and foundations')}
+            - 📘 **Islamic Ethics (Volume 2)**: {t('islamic_vol2_desc', default='Advanced Islamic ethical applications and cases')}
+            - 📙 **Reforming Modernity**: {t('reforming_desc', default='Contemporary ethical frameworks and modern perspectives')}
+            
+            **📚 {t('all_documents_combined', default='All Documents Combined')}**: {t('comprehensive_desc', default='Access all sources simultaneously for comprehensive, multi-perspective guidance')}
+            
+            **{t('benefits', default='Benefits')}:**
+            - 🎯 {t('focused_expertise', default='Get focused expertise from specific traditions')}
+            - 🔄 {t('easy_switching', default='Easily switch between different ethical perspectives')}
+            - 💬 {t('separate_conversations', default='Maintain separate conversation histories for each source')}
+            - 🔍 {t('comparative_analysis', default='Compare different approaches by chatting with multiple sources')}
+            """)
+        
+        # Show PDF status if some are missing
+        if len(available_pdfs) < len(Config.ETHICS_PDF_FILES):
+            st.warning(build_missing_docs_warning(
+                st.session_state.get('language', 'en'),
+                tuple(available_pdfs)
+            ))
+            st.info(t('app_works_with_available', default='The application will work with the available documents.'))
+        
+        if not available_pdfs:
+            st.error(t('no_documents_available', default='❌ No documents are available. Please add PDF files to the data folder.'))
+            st.stop()
+        
+        # Render ethics chat interface with file selection
+        render_ethics_chat_interface()
+        
+    except Exception as e:
+        logger.error(f"Application error: {e}")
+        st.error(f"🚨 **{t('application_error', default='Application Error')}**: {str(e)}")
+        
+        if st.checkbox(t('show_detailed_error', default='Show detailed error information')):
+            import traceback
+            st.code(traceback.format_exc())
+        
+        st.info(t('refresh_page', default='Please try refreshing the page or check your configuration.'))
+        
+        if st.button(f"🔄 {t('reset_application', default='Reset Application')}"):
+            for key in list(st.session_state.keys()):
+                del st.session_state[key]
+            st.rerun()
+
+if __name__ == '__main__':
     main()
\ No newline at end of file
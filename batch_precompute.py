@@ -0,0 +1,186 @@
+# batch_precompute.py - Offline pre-summarization via the OpenAI Batch API
+#
+# Nightly/offline job: when the ethics corpus changes, submit one Batch API
+# job that summarizes every document (50% cheaper than interactive calls,
+# higher rate limits, up to 24h turnaround) and write the results to
+# data/.summaries/<doc>.md. The chat interface uses these summaries as
+# compact context when the full documents exceed the combined token budget.
+#
+# Usage:
+#   python batch_precompute.py              # submit a batch if corpus changed
+#   python batch_precompute.py --force      # submit even if unchanged
+#   python batch_precompute.py --wait       # poll until done and write summaries
+#   python batch_precompute.py --collect ID # fetch results of an earlier batch
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import sys
+import time
+from pathlib import Path
+
+from dotenv import load_dotenv
+from openai import OpenAI
+
+from ethics_handler import EthicsConfig, _read_pdf_cached
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+load_dotenv()
+
+SUMMARIES_FOLDER = Path(EthicsConfig.DATA_FOLDER) / ".summaries"
+FINGERPRINT_FILE = SUMMARIES_FOLDER / ".corpus_fingerprint"
+SUMMARY_MODEL = EthicsConfig.MODEL
+SUMMARY_MAX_TOKENS = 700
+
+SUMMARY_SYSTEM_PROMPT = (
+    "You are an expert ethics scholar. Summarize the following ethics document "
+    "into a dense reference outline: core principles, key arguments, named "
+    "concepts, and practical guidance. Keep every distinct topic the document "
+    "covers so the summary can stand in for the full text as chat context."
+)
+
+
+def corpus_fingerprint() -> str:
+    """Fingerprint the configured corpus by (name, mtime_ns, size)"""
+    parts = []
+    for pdf_file in EthicsConfig.ETHICS_PDF_FILES:
+        pdf_path = Path(EthicsConfig.DATA_FOLDER) / pdf_file
+        if pdf_path.exists():
+            stat = pdf_path.stat()
+            parts.append(f"{pdf_file}|{stat.st_mtime_ns}|{stat.st_size}")
+    return hashlib.blake2b("\n".join(parts).encode()).hexdigest()
+
+
+def build_batch_requests() -> list:
+    """Build one Batch API request line per loadable document"""
+    requests = []
+    for pdf_file in EthicsConfig.ETHICS_PDF_FILES:
+        pdf_path = Path(EthicsConfig.DATA_FOLDER) / pdf_file
+        if not pdf_path.exists():
+            logger.warning(f"Skipping missing document: {pdf_file}")
+            continue
+
+        content, _ = _read_pdf_cached(pdf_path)
+        if not content or not content.strip():
+            logger.warning(f"Skipping unreadable document: {pdf_file}")
+            continue
+
+        requests.append({
+            "custom_id": pdf_file,
+            "method": "POST",
+            "url": "/v1/chat/completions",
+            "body": {
+                "model": SUMMARY_MODEL,
+                "messages": [
+                    {"role": "system", "content": SUMMARY_SYSTEM_PROMPT},
+                    {"role": "user", "content": content[:EthicsConfig.MAX_CONTENT_LENGTH]},
+                ],
+                "max_tokens": SUMMARY_MAX_TOKENS,
+                "temperature": EthicsConfig.TEMPERATURE,
+            },
+        })
+    return requests
+
+
+def submit_batch(client: OpenAI) -> str:
+    """Upload the request file and create the batch; returns the batch id"""
+    requests = build_batch_requests()
+    if not requests:
+        logger.error("No documents available to summarize")
+        sys.exit(1)
+
+    SUMMARIES_FOLDER.mkdir(parents=True, exist_ok=True)
+    jsonl_path = SUMMARIES_FOLDER / "batch_input.jsonl"
+    with open(jsonl_path, "w", encoding="utf-8") as f:
+        for request in requests:
+            f.write(json.dumps(request, ensure_ascii=False) + "\n")
+
+    with open(jsonl_path, "rb") as f:
+        batch_file = client.files.create(file=f, purpose="batch")
+
+    batch = client.batches.create(
+        input_file_id=batch_file.id,
+        endpoint="/v1/chat/completions",
+        completion_window="24h",
+        metadata={"job": "ethics-doc-summaries"},
+    )
+    logger.info(f"Submitted batch {batch.id} with {len(requests)} documents")
+    return batch.id
+
+
+def collect_batch(client: OpenAI, batch_id: str, wait: bool = False) -> bool:
+    """Download finished batch output and write per-document summary files"""
+    while True:
+        batch = client.batches.retrieve(batch_id)
+        if batch.status == "completed":
+            break
+        if batch.status in ("failed", "expired", "cancelled"):
+            logger.error(f"Batch {batch_id} ended with status: {batch.status}")
+            return False
+        if not wait:
+            logger.info(f"Batch {batch_id} still {batch.status}; re-run with --collect {batch_id} later")
+            return False
+        logger.info(f"Batch {batch_id} is {batch.status}; polling again in 60s")
+        time.sleep(60)
+
+    output = client.files.content(batch.output_file_id)
+    SUMMARIES_FOLDER.mkdir(parents=True, exist_ok=True)
+
+    written = 0
+    for line in output.text.splitlines():
+        if not line.strip():
+            continue
+        result = json.loads(line)
+        doc_name = result.get("custom_id", "")
+        response = result.get("response") or {}
+        if response.get("status_code") != 200:
+            logger.warning(f"Batch request for {doc_name} failed: {response.get('status_code')}")
+            continue
+        choices = response.get("body", {}).get("choices", [])
+        if not choices:
+            logger.warning(f"No summary returned for {doc_name}")
+            continue
+        summary = choices[0]["message"]["content"].strip()
+        summary_path = SUMMARIES_FOLDER / f"{doc_name}.md"
+        summary_path.write_text(summary + "\n", encoding="utf-8")
+        logger.info(f"Wrote {summary_path}")
+        written += 1
+
+    if written:
+        FINGERPRINT_FILE.write_text(corpus_fingerprint(), encoding="utf-8")
+    return written > 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute ethics document summaries via the OpenAI Batch API")
+    parser.add_argument("--force", action="store_true", help="submit even if the corpus is unchanged")
+    parser.add_argument("--wait", action="store_true", help="poll until the batch finishes and write summaries")
+    parser.add_argument("--collect", metavar="BATCH_ID", help="collect results of a previously submitted batch")
+    args = parser.parse_args()
+
+    api_key = os.getenv("OPENAI_API_KEY")
+    if not api_key:
+        logger.error("OPENAI_API_KEY is not configured")
+        sys.exit(1)
+    client = OpenAI(api_key=api_key)
+
+    if args.collect:
+        sys.exit(0 if collect_batch(client, args.collect, wait=args.wait) else 1)
+
+    if not args.force and FINGERPRINT_FILE.exists():
+        if FINGERPRINT_FILE.read_text(encoding="utf-8").strip() == corpus_fingerprint():
+            logger.info("Corpus unchanged since last summarization; nothing to do")
+            return
+
+    batch_id = submit_batch(client)
+    if args.wait:
+        sys.exit(0 if collect_batch(client, batch_id, wait=True) else 1)
+    logger.info(f"Collect results later with: python batch_precompute.py --collect {batch_id}")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,7 @@
 
 import streamlit as st
 import json
+from functools import lru_cache
 from pathlib import Path
 import logging
 
@@ -13,7 +14,10 @@ TRANSLATIONS = {}
 def load_translations():
     """Load translations from JSON files"""
     global TRANSLATIONS
-    
+
+    # Translations are being replaced, so drop any memoized lookups
+    _t_cached.cache_clear()
+
     translations_dir = Path("translations")
     
     # Default English fallback
@@ -96,33 +100,41 @@ def get_language_name(lang_code):
     }
     return names.get(lang_code, lang_code)
 
-def t(key, default=None, **kwargs):
-    """Translation function"""
-    current_lang = get_current_language()
-    
+@lru_cache(maxsize=4096)
+def _t_cached(lang, key, default):
+    """Resolve a translation for (language, key); cached because the render
+    functions call t() dozens of times per Streamlit rerun"""
     # Try current language first
-    if current_lang in TRANSLATIONS and key in TRANSLATIONS[current_lang]:
-        text = TRANSLATIONS[current_lang][key]
+    if lang in TRANSLATIONS and key in TRANSLATIONS[lang]:
+        text = TRANSLATIONS[lang][key]
     # Fallback to English
     elif key in TRANSLATIONS.get('en', {}):
         text = TRANSLATIONS['en'][key]
     # Use default or key
     else:
         text = default if default else key
-    
+
+    return str(text)
+
+def t(key, default=None, **kwargs):
+    """Translation function"""
+    text = _t_cached(get_current_language(), key, default)
+
     # Handle parameter substitution
-    if kwargs and isinstance(text, str) and '{' in text:
+    if kwargs and '{' in text:
         try:
             text = text.format(**kwargs)
         except (KeyError, ValueError):
             pass  # Ignore formatting errors
-    
-    return str(text)
+
+    return text
 
 def init_language_system():
     """Initialize the language system"""
-    # Load translations
-    load_translations()
+    # Load translations once per process; every rerun re-enters here, and
+    # re-reading the JSON files each time would also flush the t() cache
+    if not TRANSLATIONS:
+        load_translations()
     
     # Initialize session state
     if 'language' not in st.session_state:
@@ -150,14 +162,15 @@ def render_language_selector():
             current_lang = 'en'
             st.session_state.language = 'en'
         
+        lang_codes = list(available_langs)
         try:
-            current_index = list(available_langs.keys()).index(current_lang)
+            current_index = lang_codes.index(current_lang)
         except ValueError:
             current_index = 0
-        
+
         selected = st.selectbox(
             t('language_selector', 'Language'),
-            options=list(available_langs.keys()),
+            options=lang_codes,
             format_func=lambda x: available_langs[x],
             index=current_index,
             key="lang_selector"